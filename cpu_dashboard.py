@@ -4,7 +4,8 @@ import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 import re
-import colorsys
+import io
+import hashlib
 
 st.set_page_config(page_title="CPU Usage Dashboard", page_icon="🖥️", layout="wide")
 
@@ -22,116 +23,196 @@ st.markdown("App interactiva para monitorear porcentajes de CPU por VM y NE Name
 
 # --- FUNCIONES DE PROCESAMIENTO ---
 
-def extract_vm_info(vm_str):
+# Columnas mínimas requeridas en el CSV
+REQUIRED_COLUMNS = ["Start Time", "NE Name", "VM"]
+
+# Columnas de CPU soportadas (en orden de preferencia para cada métrica)
+CPU_COLUMN_SOURCES = {
+    "CPU_Max": ["Maximum CPU Load (%)", "CPU max usage (%)"],
+    "CPU_Mean": ["Mean CPU Load (%)", "CPU average usage (%)"],
+}
+
+# Intervalos (horas) de la gráfica de tendencia y máximo de puntos por gráfica
+# (un NE) antes de pasar al siguiente intervalo
+TREND_BUCKET_HOURS = [2, 6]
+TREND_MAX_POINTS = 50_000
+
+# Formatos conocidos de "Start Time" (se prueban en orden antes de inferir)
+START_TIME_FORMATS = [
+    "%Y-%m-%d %H:%M:%S",
+    "%Y-%m-%d %H:%M",
+    "%m/%d/%Y %H:%M:%S",
+    "%m/%d/%Y %H:%M",
+]
+
+# Filas usadas para detectar el formato de "Start Time"
+START_TIME_SAMPLE_ROWS = 100
+
+# Paleta fija de tonos (hues) para las gráficas - siempre en el mismo orden
+# Distribuidos uniformemente en el espectro de color
+FIXED_HUES = [
+    0.00,  # Rojo
+    0.10,  # Rojo-naranja
+    0.20,  # Naranja
+    0.30,  # Amarillo
+    0.40,  # Amarillo-verde
+    0.50,  # Verde
+    0.60,  # Verde-cian
+    0.70,  # Cian
+    0.80,  # Azul
+    0.90,  # Magenta
+]
+
+# Layout común de las gráficas de tendencia por NE
+TREND_LAYOUT = dict(
+    template="plotly_white",
+    hovermode="closest",
+    legend=dict(
+        orientation="v",
+        yanchor="top",
+        y=1,
+        xanchor="left",
+        x=1.02,
+    ),
+    yaxis=dict(range=[0, 100]),
+)
+
+# Combinaciones de filtros que se conservan en caché. filter_data guarda el
+# DataFrame filtrado completo, por eso su límite es menor que el de los
+# agregados (tendencia y estadísticas).
+FILTER_CACHE_ENTRIES = 4
+AGGREGATE_CACHE_ENTRIES = 32
+
+# Filas por página en la tabla de datos detallados
+DETAIL_PAGE_SIZE = 500
+
+# Columnas que se leen del CSV; el resto se descarta al parsear
+USED_COLUMNS = set(REQUIRED_COLUMNS).union(*CPU_COLUMN_SOURCES.values())
+
+# Tipos explícitos al leer el CSV: las columnas de texto repetidas llegan
+# directamente como categorías, sin inferencia ni cadenas por fila. Las de CPU
+# se siguen infiriendo porque pueden traer valores no numéricos.
+CSV_DTYPES = {"NE Name": "category", "VM": "category"}
+
+# Línea de cabecera: contiene "Start Time" y "NE Name" (en cualquier orden)
+HEADER_RE = re.compile(rb"^(?=[^\n]*Start Time)(?=[^\n]*NE Name)", re.M)
+
+# Primeras 50 líneas del archivo, donde se busca la cabecera
+HEADER_SCAN_RE = re.compile(rb"(?:[^\n]*\n){0,49}[^\n]*")
+
+# Reglas de VM Type para el formato antiguo (orden de prioridad)
+VM_TYPE_RULES = [
+    "IPU_A",
+    "IPU_B_ARM",
+    "IPU_B",
+    "ISU_ARM",
+    "ISU_C48",
+    "SDU_A_ARM",
+    "SDU_A",
+    "SPU_CGW",
+    "SPU_B",
+    "SPU_C",
+    "SPU_K1",
+    "SPU_O",
+    "SPU_P",
+    "SPU_J_ARM",
+    "SPU_J",
+    "SPU_M_ARM",
+    "SPU_M",
+    "SPU_G",
+    "OMU",
+]
+
+# Una sola pasada con las alternativas en orden de prioridad. Cada alternativa
+# está anclada al inicio, por lo que gana la primera regla presente en el
+# nombre, igual que la cadena if/elif original. DOTALL: un campo entre
+# comillas puede traer saltos de línea, que las pruebas con `in` no distinguían.
+VM_TYPE_RULES_RE = re.compile(
+    "^(?:" + "|".join(f".*?({re.escape(rule)})" for rule in VM_TYPE_RULES) + ")",
+    re.DOTALL,
+)
+
+# Familias de las reglas (IPU, ISU, SDU, SPU, OMU): un nombre que no contiene
+# ninguna no puede cumplir ninguna regla y va directo al patrón general.
+VM_TYPE_FAMILY_RE = re.compile("|".join(sorted({rule[:3] for rule in VM_TYPE_RULES})))
+
+# Patrón general: Primera palabra en mayúsculas antes de un guion bajo o número
+VM_TYPE_PREFIX_RE = re.compile(r"^([A-Z]+)")
+
+# Formato antiguo: "nodeName=VNFP, VM Name=SPU_CGW_0080"
+VM_NAME_RE = re.compile(r"VM Name=([^,\"]+)")
+
+# Formato nuevo: "Virtual machine name=VES_SBC08_BSU_3"
+# (DOTALL por los saltos de línea, igual que VM_TYPE_RULES_RE)
+NEW_VM_NAME_RE = re.compile(r"Virtual machine name=(.*)", re.DOTALL)
+NEW_VM_NAME_PARTS_RE = re.compile(r"^[^_]*_(.*)$", re.DOTALL)  # Sin el site (primera parte)
+NEW_VM_TYPE_RE = re.compile(r"^(.*)_[^_]*$", re.DOTALL)  # Sin el último segmento
+
+def extract_vm_info(vm_series):
     """
-    Extrae el VM Name y el VM Type de la cadena raw del CSV.
+    Extrae el VM Name y el VM Type de la columna raw del CSV de forma vectorizada.
     Soporta dos formatos:
     1. Old: "nodeName=VNFP, VM Name=SPU_CGW_0080"
     2. New: "Virtual machine name=VES_SBC08_BSU_3"
-    Retorna: (vm_name, vm_type)
+    Retorna: (vm_name, vm_type) como Series alineadas con vm_series
     """
-    if pd.isna(vm_str):
-        return None, None
-    
-    vm_str = str(vm_str).strip()
-    
+    # Cada VM se repite en todos los intervalos del export: se procesan solo
+    # los valores únicos y luego se expanden al largo original.
+    codes, uniques = pd.factorize(vm_series)
+    vm = pd.Series(uniques).astype("string").str.strip()
+    vm_name = pd.Series(pd.NA, index=vm.index, dtype="string")
+    vm_type = pd.Series(pd.NA, index=vm.index, dtype="string")
+
+    # Una sola extracción detecta el formato nuevo y obtiene su nombre
+    new_vm = vm.str.extract(NEW_VM_NAME_RE, expand=False)
+    is_new = new_vm.notna()
+    is_old = vm.notna() & ~is_new
+
     # --- FORMATO NUEVO ---
     # Ejemplo: "Virtual machine name=VES_SBC08_BSU_3"
-    if "Virtual machine name=" in vm_str:
-        try:
-            # Extraer el valor después del igual
-            full_vm_name = vm_str.split("Virtual machine name=")[1].strip()
-            
-            parts = full_vm_name.split('_')
-            
-            # Regla: Retirar site y nombre del equipo (primeras 1 partes)
-            # Ejemplo: ARQ_SBCOMU02_OMUSBIG2_1 -> [ARQ, SBCOMU02, OMUSBIG2, 1] -> SBCOMU02_OMUSBIG2_1
-            
-            if len(parts) > 1:
-                # VM Name: Desde la 2ra parte hasta el final
-                vm_name = "_".join(parts[1:])
-                
-                # VM Type: Desde la 2ra parte hasta el penúltimo
-                # (Es decir, el nuevo VM Name sin el último segmento)
-                if len(parts) > 2:
-                    vm_type = "_".join(parts[1:-1])
-                else:
-                    # Caso borde: A_B_C -> VM Name=C. Type?
-                    # Si solo queda una parte en el nombre (ej. C), el tipo podría ser C o UNKNOWN.
-                    # Asumiremos que es esa misma parte si no hay sufijo numérico claro, o UNKNOWN.
-                    # Para consistencia con "hasta el último guion bajo", si no hay guiones en el nuevo nombre,
-                    # tomamos todo el nombre.
-                    vm_type = vm_name
-            else:
-                # Fallback si no tiene la estructura esperada (menos de 2 partes)
-                vm_name = full_vm_name
-                vm_type = "UNKNOWN"
-                
-            return vm_name, vm_type
-        except Exception:
-            return vm_str, "ERROR"
+    # Regla: Retirar site y nombre del equipo (primeras 1 partes)
+    # Ejemplo: ARQ_SBCOMU02_OMUSBIG2_1 -> SBCOMU02_OMUSBIG2_1
+    full_vm_name = new_vm[is_new].str.strip()
+
+    # VM Name: Desde la 2da parte hasta el final
+    new_name = full_vm_name.str.extract(NEW_VM_NAME_PARTS_RE, expand=False)
+    has_parts = new_name.notna()
+
+    # VM Type: el nuevo VM Name sin el último segmento. Si no quedan guiones
+    # bajos en el nuevo nombre, tomamos todo el nombre.
+    new_type = new_name.str.extract(NEW_VM_TYPE_RE, expand=False).fillna(new_name)
+
+    # Fallback si no tiene la estructura esperada (menos de 2 partes)
+    vm_name[is_new] = new_name.where(has_parts, full_vm_name)
+    vm_type[is_new] = new_type.where(has_parts, "UNKNOWN")
 
     # --- FORMATO ANTIGUO ---
     # Ejemplo raw: "nodeName=VNFP, VM Name=SPU_CGW_0080"
-    
-    # Extraer VM Name
-    match_name = re.search(r"VM Name=([^,\"]+)", vm_str)
-    if match_name:
-        vm_name = match_name.group(1).strip()
-    else:
-        vm_name = vm_str
-    
-    # Extraer VM Type (Lógica original)
-    vm_name_upper = vm_name.upper()
-    
-    # REGLAS ESPECÍFICAS (Orden de prioridad)
-    if "IPU_A" in vm_name_upper:
-        vm_type = "IPU_A"
-    elif "IPU_B_ARM" in vm_name_upper:
-        vm_type = "IPU_B_ARM"
-    elif "IPU_B" in vm_name_upper:
-        vm_type = "IPU_B"
-    elif "ISU_ARM" in vm_name_upper:
-        vm_type = "ISU_ARM"
-    elif "ISU_C48" in vm_name_upper:
-        vm_type = "ISU_C48"
-    elif "SDU_A_ARM" in vm_name_upper:
-        vm_type = "SDU_A_ARM"
-    elif "SDU_A" in vm_name_upper:
-        vm_type = "SDU_A"
-    elif "SPU_CGW" in vm_name_upper:
-        vm_type = "SPU_CGW"
-    elif "SPU_B" in vm_name_upper:
-        vm_type = "SPU_B"
-    elif "SPU_C" in vm_name_upper:
-        vm_type = "SPU_C"
-    elif "SPU_K1" in vm_name_upper:
-        vm_type = "SPU_K1"
-    elif "SPU_O" in vm_name_upper:
-        vm_type = "SPU_O"
-    elif "SPU_P" in vm_name_upper:
-        vm_type = "SPU_P"
-    elif "SPU_J_ARM" in vm_name_upper:
-        vm_type = "SPU_J_ARM"
-    elif "SPU_J" in vm_name_upper:
-        vm_type = "SPU_J"
-    elif "SPU_M_ARM" in vm_name_upper:
-        vm_type = "SPU_M_ARM"
-    elif "SPU_M" in vm_name_upper:
-        vm_type = "SPU_M"
-    elif "SPU_G" in vm_name_upper:
-        vm_type = "SPU_G"
-    elif "OMU" in vm_name_upper:
-        vm_type = "OMU"
-    else:
-        # Patrón general: Primera palabra en mayúsculas antes de un guion bajo o número
-        match_type = re.search(r"^([A-Z]+)", vm_name)
-        if match_type:
-            vm_type = match_type.group(1)
-        else:
-            vm_type = "UNKNOWN"
-            
-    return vm_name, vm_type
+    old_vm = vm[is_old]
+    old_name = old_vm.str.extract(VM_NAME_RE, expand=False).str.strip().fillna(old_vm)
+
+    # REGLAS ESPECÍFICAS (ver VM_TYPE_RULES_RE), solo sobre los nombres de
+    # alguna familia conocida
+    old_upper = old_name.str.upper()
+    has_family = old_upper.str.contains(VM_TYPE_FAMILY_RE, na=False).to_numpy()
+    rule_matches = np.zeros((len(old_upper), len(VM_TYPE_RULES)), dtype=bool)
+    rule_matches[has_family] = old_upper[has_family].str.extract(VM_TYPE_RULES_RE, expand=True).notna().to_numpy()
+    old_type = pd.Series(
+        np.where(rule_matches.any(axis=1), np.array(VM_TYPE_RULES, dtype=object)[rule_matches.argmax(axis=1)], None),
+        index=old_name.index,
+        dtype="string",
+    )
+
+    # Patrón general: Primera palabra en mayúsculas antes de un guion bajo o número
+    old_type = old_type.fillna(old_name.str.extract(VM_TYPE_PREFIX_RE, expand=False)).fillna("UNKNOWN")
+
+    vm_name[is_old] = old_name
+    vm_type[is_old] = old_type
+
+    return (
+        pd.Series(vm_name.array.take(codes, allow_fill=True), index=vm_series.index),
+        pd.Series(vm_type.array.take(codes, allow_fill=True), index=vm_series.index),
+    )
 
 def normalize_legend_base(label):
     """
@@ -141,201 +222,224 @@ def normalize_legend_base(label):
     label = str(label).strip()
     return re.sub(r"\d+$", "", label)
 
-def generate_color_map(df, label_column="Legend"):
-    """
-    Genera un mapa de colores donde:
-    - Cada NE tiene un tono base único (mismo hue) de una paleta fija
-    - Cada VM Type dentro del NE tiene saturación/luminosidad única
-    Esto crea "familias" de colores visualmente agrupadas pero distinguibles.
-    """
-    # Paleta fija de tonos (hues) - siempre en el mismo orden
-    # Distribuidos uniformemente en el espectro de color
-    FIXED_HUES = [
-        0.00,  # Rojo
-        0.10,  # Rojo-naranja
-        0.20,  # Naranja
-        0.30,  # Amarillo
-        0.40,  # Amarillo-verde
-        0.50,  # Verde
-        0.60,  # Verde-cian
-        0.70,  # Cian
-        0.80,  # Azul
-        0.90,  # Magenta
-    ]
-    
-    ne_names = sorted(df["NE Name"].unique())
-    
-    # Asignar tono fijo a cada NE según su posición alfabética
-    ne_hues = {}
-    for i, ne in enumerate(ne_names):
-        # Usar módulo para ciclar si hay más NEs que colores en la paleta
-        ne_hues[ne] = FIXED_HUES[i % len(FIXED_HUES)]
-    
-    # Generar colores para cada combinación NE-VMType
-    color_map = {}
-    for ne in ne_names:
-        base_hue = ne_hues[ne]
-        if label_column not in df.columns:
-            label_column = "VM_Type"
-        ne_vm_types = sorted(df[df["NE Name"] == ne][label_column].unique())
-        
-        for j, vm_type in enumerate(ne_vm_types):
-            # Variar saturación y luminosidad para diferenciar tipos de VM
-            # Saturación: 70% a 100% (colores más vivos y saturados)
-            # Luminosidad: 90% a 70% (de claro a oscuro, invertido para mejor contraste)
-            num_types = max(len(ne_vm_types) - 1, 1)
-            saturation = 0.70 + (j / num_types) * 0.30
-            lightness = 0.70 - (j / num_types) * 0.20
-            
-            # Convertir HSL a RGB
-            r, g, b = colorsys.hls_to_rgb(base_hue, lightness, saturation)
-            color_hex = f'#{int(r*255):02x}{int(g*255):02x}{int(b*255):02x}'
-            
-            legend_key = f"{vm_type}"
-            color_map[legend_key] = color_hex
-    
-    return color_map
+def hls_to_rgb_batch(hues, lightnesses, saturations):
+    """
+    Versión vectorizada de colorsys.hls_to_rgb sobre arrays de NumPy.
+    Replica las mismas operaciones, por lo que los colores son idénticos.
+    Retorna un array (n, 3) con r, g, b en [0, 1].
+    """
+    hues = np.asarray(hues, dtype=float)
+    lightnesses = np.asarray(lightnesses, dtype=float)
+    saturations = np.asarray(saturations, dtype=float)
+
+    m2 = np.where(
+        lightnesses <= 0.5,
+        lightnesses * (1.0 + saturations),
+        lightnesses + saturations - (lightnesses * saturations),
+    )
+    m1 = 2.0 * lightnesses - m2
+
+    def channel(hue):
+        hue = hue % 1.0
+        return np.select(
+            [hue < 1.0 / 6.0, hue < 0.5, hue < 2.0 / 3.0],
+            [m1 + (m2 - m1) * hue * 6.0, m2, m1 + (m2 - m1) * (2.0 / 3.0 - hue) * 6.0],
+            default=m1,
+        )
+
+    rgb = np.column_stack(
+        (channel(hues + 1.0 / 3.0), channel(hues), channel(hues - 1.0 / 3.0))
+    )
+    # Sin saturación el color es un gris con la misma luminosidad
+    rgb[saturations == 0.0] = lightnesses[saturations == 0.0, None]
+    return rgb
+
+def rgb_to_hex(rgb):
+    """
+    Convierte un array (n, 3) de r, g, b en [0, 1] a cadenas '#rrggbb'.
+    Los canales se empaquetan en un uint32 para formatear un solo entero por color.
+    """
+    channels = (np.asarray(rgb, dtype=float) * 255).astype(np.uint32)
+    packed = (channels[:, 0] << 16) | (channels[:, 1] << 8) | channels[:, 2]
+    return [f"#{value:06x}" for value in packed.tolist()]
 
 def generate_color_map_single_ne(df, ne_name, label_column="Legend"):
     """
     Genera un mapa de colores para un solo NE usando diferentes hues de la paleta
     para cada VM Type (en lugar de variaciones del mismo tono).
+    El cálculo se cachea sobre las etiquetas del NE, no sobre el DataFrame.
     """
-    FIXED_HUES = [
-        0.00,  # Rojo
-        0.10,  # Rojo-naranja
-        0.20,  # Naranja
-        0.30,  # Amarillo
-        0.40,  # Amarillo-verde
-        0.50,  # Verde
-        0.60,  # Verde-cian
-        0.70,  # Cian
-        0.80,  # Azul
-        0.90,  # Magenta
-    ]
-    
     if label_column not in df.columns:
         label_column = "VM_Type"
 
-    vm_types = sorted(df[df["NE Name"] == ne_name][label_column].unique())
+    vm_types = tuple(sorted(df.loc[df["NE Name"] == ne_name, label_column].unique()))
+    return build_color_map_single_ne(vm_types)
+
+@st.cache_data(show_spinner=False)
+def build_color_map_single_ne(vm_types):
+    """
+    Construye el mapa de colores de un NE a partir de la tupla ordenada de
+    sus etiquetas. Solo se recalcula cuando cambia el conjunto de etiquetas.
+    """
+    if not vm_types:
+        return {}
     
-    color_map = {}
-    for i, vm_type in enumerate(vm_types):
-        # Asignar un hue diferente a cada VM Type
-        hue = FIXED_HUES[i % len(FIXED_HUES)]
-        
-        # Usar saturación y luminosidad fijas para colores vibrantes
-        saturation = 0.85
-        lightness = 0.60
-        
-        # Convertir HSL a RGB
-        r, g, b = colorsys.hls_to_rgb(hue, lightness, saturation)
-        color_hex = f'#{int(r*255):02x}{int(g*255):02x}{int(b*255):02x}'
-        
-        legend_key = f"{vm_type}"
-        color_map[legend_key] = color_hex
+    # Asignar un hue diferente a cada VM Type, ciclando la paleta
+    hues = np.resize(FIXED_HUES, len(vm_types))
+    
+    # Usar saturación y luminosidad fijas para colores vibrantes
+    saturations = np.full(len(vm_types), 0.85)
+    lightnesses = np.full(len(vm_types), 0.60)
     
-    return color_map
+    # Convertir HSL a RGB en un solo paso para todos los colores
+    rgb = hls_to_rgb_batch(hues, lightnesses, saturations)
+    return {f"{vm_type}": color_hex for vm_type, color_hex in zip(vm_types, rgb_to_hex(rgb))}
 
 def build_vm_family_figure(df_ne, cpu_column, cpu_label, title, color_map):
     """
     Construye una figura con una traza por VM, pero una sola entrada de leyenda por familia.
     """
-    fig = go.Figure()
     seen_legends = set()
+    traces = []
+
+    # El hovertemplate es el mismo para todas las trazas de la figura. VM_Name
+    # y VM_Type son constantes en cada traza: van en meta, no por punto.
+    hovertemplate = (
+        "Legend=%{fullData.name}<br>"
+        "VM_Name=%{meta[0]}<br>"
+        "VM_Type=%{meta[1]}<br>"
+        "Date=%{x|%b %d, %Y, %H:%M}<br>"
+        f"{cpu_label}=%{{y:.2f}}%<extra></extra>"
+    )
 
-    for vm_name, vm_df in df_ne.sort_values(["Legend", "VM_Name", "Date"]).groupby("VM_Name", sort=False):
+    for vm_name, vm_df in df_ne.sort_values(["Legend", "VM_Name", "Date"]).groupby("VM_Name", observed=True, sort=False):
         legend_label = vm_df["Legend"].iloc[0]
         color = color_map.get(legend_label, "#1f77b4")
 
-        fig.add_trace(
-            go.Scatter(
-                x=vm_df["Date"],
-                y=vm_df[cpu_column],
+        # Scattergl: el navegador dibuja los puntos con WebGL en lugar de SVG.
+        # Los arrays de NumPy pasan directo al serializador JSON de Plotly.
+        traces.append(
+            go.Scattergl(
+                x=vm_df["Date"].to_numpy(),
+                y=vm_df[cpu_column].to_numpy(),
                 mode="lines+markers",
                 name=legend_label,
                 legendgroup=legend_label,
                 showlegend=legend_label not in seen_legends,
                 line=dict(width=2, color=color),
                 marker=dict(size=4, color=color, opacity=0.8),
-                customdata=np.column_stack(
-                    (
-                        vm_df["VM_Name"].astype(str),
-                        vm_df["VM_Type"].astype(str),
-                    )
-                ),
-                hovertemplate=(
-                    "Legend=%{fullData.name}<br>"
-                    "VM_Name=%{customdata[0]}<br>"
-                    "VM_Type=%{customdata[1]}<br>"
-                    "Date=%{x|%b %d, %Y, %H:%M}<br>"
-                    f"{cpu_label}=%{{y:.2f}}%<extra></extra>"
-                ),
+                meta=[str(vm_name), str(vm_df["VM_Type"].iloc[0])],
+                hovertemplate=hovertemplate,
             )
         )
         seen_legends.add(legend_label)
 
-    fig.update_layout(
-        title=title,
-        template="plotly_white",
-        hovermode="closest",
-        legend=dict(
-            orientation="v",
-            yanchor="top",
-            y=1,
-            xanchor="left",
-            x=1.02,
-        ),
-    )
-    fig.update_yaxes(range=[0, 100])
-    return fig
+    # Agregar todas las trazas y el layout al construir la figura: add_trace por
+    # VM y update_layout/update_yaxes posteriores revalidan la figura completa
+    return go.Figure(data=traces, layout=dict(title=title, **TREND_LAYOUT))
+
 
+def parse_start_time(start_time):
+    """
+    Convierte "Start Time" a datetime. Usa el primer formato de
+    START_TIME_FORMATS que sirva para una muestra de filas; si ninguno sirve,
+    deja que Pandas infiera el formato (ISO, zonas horarias, etc.).
+    """
+    # PyArrow ya entrega las fechas ISO como datetime
+    if pd.api.types.is_datetime64_any_dtype(start_time):
+        return start_time
+
+    sample = start_time.dropna().head(START_TIME_SAMPLE_ROWS)
+    for date_format in START_TIME_FORMATS:
+        if pd.to_datetime(sample, format=date_format, errors='coerce').notna().all():
+            return pd.to_datetime(start_time, format=date_format, errors='coerce', cache=True)
+
+    return pd.to_datetime(start_time, errors='coerce', cache=True)
 
-@st.cache_data
 def load_data(uploaded_file):
+    """
+    Carga un archivo subido. La caché se calcula sobre el contenido del
+    archivo (hash MD5 de los bytes), no sobre el objeto UploadedFile.
+    El hash se calcula una sola vez por archivo subido (file_id) y se
+    reutiliza en cada rerun, en lugar de volver a hashear todos los bytes.
+    """
+    content_hashes = st.session_state.setdefault("content_hashes", {})
+    if uploaded_file.file_id not in content_hashes:
+        content_hashes[uploaded_file.file_id] = hashlib.md5(uploaded_file.getvalue()).hexdigest()
+    return load_csv_bytes(uploaded_file.name, uploaded_file.getvalue(), content_hashes[uploaded_file.file_id])
+
+@st.cache_data(persist="disk", max_entries=16, show_spinner="Procesando CSV…")
+def load_csv_bytes(file_name, _raw, content_hash):
+    """
+    Parsea el CSV. _raw no se hashea: la caché se indexa por file_name y
+    content_hash.
+    """
     try:
-        # Leer contenido para buscar cabecera
-        content = uploaded_file.getvalue().decode('utf-8', errors='replace')
-        lines = content.split('\n')
-        header_row = 0
-        for i, line in enumerate(lines[:50]):
-            if "Start Time" in line and "NE Name" in line:
-                header_row = i
-                break
-        
-        uploaded_file.seek(0)
-        df = pd.read_csv(uploaded_file, skiprows=header_row)
+        # Buscar la cabecera en las primeras 50 líneas con una sola pasada de
+        # regex sobre los bytes, sin decodificar el archivo completo
+        header_limit = HEADER_SCAN_RE.match(_raw).end()
+        header_match = HEADER_RE.search(_raw, 0, header_limit)
+        header_offset = header_match.start() if header_match else 0
+
+        # Leer desde la cabecera posicionando el buffer: BytesIO comparte los
+        # bytes originales, mientras que _raw[header_offset:] copiaría el archivo
+        buffer = io.BytesIO(_raw)
+
+        # Leer solo las columnas que usa el dashboard. La cabecera se toma de
+        # una muestra leída como texto, que además conserva "Start Time" tal
+        # como viene en el export (ver el procesamiento de fechas)
+        buffer.seek(header_offset)
+        sample = pd.read_csv(buffer, nrows=START_TIME_SAMPLE_ROWS, dtype=str)
+        header = sample.columns
+        usecols = [c for c in header if c.strip() in USED_COLUMNS]
+        dtypes = {c: CSV_DTYPES[c.strip()] for c in usecols if c.strip() in CSV_DTYPES}
+        try:
+            buffer.seek(header_offset)
+            df = pd.read_csv(buffer, engine="pyarrow", usecols=usecols, dtype=dtypes)
+        except Exception:
+            # El parser de PyArrow es más estricto (filas irregulares, etc.)
+            buffer.seek(header_offset)
+            df = pd.read_csv(buffer, usecols=usecols, dtype=dtypes)
         
         # Limpieza de columnas (strip whitespace)
         df.columns = [c.strip() for c in df.columns]
         
         # Validar columnas mínimas requeridas
         # Nota: "CPU usage" puede variar de nombre, lo validamos después
-        required_cols_base = ["Start Time", "NE Name", "VM"]
-        if not all(col in df.columns for col in required_cols_base):
+        if not all(col in df.columns for col in REQUIRED_COLUMNS):
             return None
 
         # Procesar fechas
-        # Intentar inferir formato, soporta ISO y formatos locales
-        df["Date"] = pd.to_datetime(df["Start Time"], errors='coerce')
+        df["Date"] = parse_start_time(df["Start Time"])
+        if df["Date"].dt.tz is not None:
+            # PyArrow convierte a UTC las fechas con offset (ej. "+05:00"):
+            # volver al offset del export, tomado de la muestra en texto, y
+            # quitar la zona para conservar la hora local como datetime64
+            sample_start = sample.rename(columns=str.strip)["Start Time"].dropna().head(1)
+            export_tz = pd.to_datetime(sample_start, errors='coerce').dt.tz
+            df["Date"] = df["Date"].dt.tz_convert(export_tz).dt.tz_localize(None)
+
+        # Eliminar filas inválidas antes de derivar el resto de columnas,
+        # así el procesamiento de VM y CPU solo recorre filas útiles
+        df = df.dropna(subset=["Date", "VM"])
+
+        # Ordenar por fecha (estable): filter_data ubica el rango de fechas
+        # con búsqueda binaria en lugar de comparar fila por fila
+        df = df.sort_values("Date", kind="mergesort")
         
         # Procesar VM Info
-        vm_info = df["VM"].apply(extract_vm_info)
-        df["VM_Name"] = [x[0] for x in vm_info]
-        df["VM_Type"] = [x[1] for x in vm_info]
+        df["VM_Name"], df["VM_Type"] = extract_vm_info(df["VM"])
         
         # Procesar CPU Usage sin exigir el par completo.
         # Si el archivo trae ambas columnas, luego se permite elegir cuál usar.
-        cpu_column_sources = {
-            "CPU_Max": ["Maximum CPU Load (%)", "CPU max usage (%)"],
-            "CPU_Mean": ["Mean CPU Load (%)", "CPU average usage (%)"],
-        }
-
         available_cpu_columns = []
-        for cpu_column, source_columns in cpu_column_sources.items():
+        for cpu_column, source_columns in CPU_COLUMN_SOURCES.items():
             for source_column in source_columns:
                 if source_column in df.columns:
-                    df[cpu_column] = pd.to_numeric(df[source_column], errors='coerce')
+                    # float32 basta para porcentajes y reduce a la mitad la memoria.
+                    # pop() descarta la columna original (float64) en lugar de
+                    # conservar ambas copias.
+                    df[cpu_column] = pd.to_numeric(df.pop(source_column), errors='coerce').astype("float32")
                     available_cpu_columns.append(cpu_column)
                     break
 
@@ -346,16 +450,170 @@ def load_data(uploaded_file):
                 "'CPU max usage (%)' o 'CPU average usage (%)'."
             )
             return None, []
-            
-        # Eliminar filas inválidas
-        df = df.dropna(subset=["Date", "VM_Name"])
+
+        # Intervalo base de la tendencia (TREND_BUCKET_HOURS[0] horas)
+        df["Date_Hour"] = df["Date"].dt.floor(f"{TREND_BUCKET_HOURS[0]}h")
+
+        # Columnas de baja cardinalidad como categorías: groupby/isin trabajan
+        # sobre códigos enteros en lugar de cadenas repetidas
+        for col in ["VM_Name", "VM_Type"]:
+            df[col] = df[col].astype("category")
+        # NE Name ya llega como categoría (CSV_DTYPES): quitar las que solo
+        # tenían filas descartadas
+        df["NE Name"] = df["NE Name"].cat.remove_unused_categories()
+        # Categorías en orden alfabético: el sidebar las usa como opciones
+        # sin recorrer la columna en cada rerun
+        for col in ["NE Name", "VM_Type"]:
+            df[col] = df[col].cat.set_categories(sorted(df[col].cat.categories))
         
         return df, available_cpu_columns
         
     except Exception as e:
-        st.error(f"Error procesando el archivo {uploaded_file.name}: {e}")
+        st.error(f"Error procesando el archivo {file_name}: {e}")
         return None, []
 
+@st.cache_resource(max_entries=FILTER_CACHE_ENTRIES, show_spinner=False)
+def filter_data(_df, file_key, start_ts, end_ts, selected_nes, selected_types, cpu_column):
+    """
+    Aplica los filtros del sidebar y descarta filas sin valor de CPU.
+    _df no se hashea: la caché se indexa por file_key y los filtros.
+    Se usa cache_resource: cada acierto devuelve el mismo DataFrame sin
+    deserializar una copia, por lo que el resultado es de solo lectura.
+    """
+    # _df está ordenado por Date: el rango de fechas es un slice contiguo
+    # [start, end) que se ubica con búsqueda binaria
+    start, end = _df["Date"].to_numpy().searchsorted([start_ts.to_datetime64(), end_ts.to_datetime64()])
+    df_range = _df.iloc[start:end]
+
+    # Máscara sobre arrays de NumPy combinada en el lugar (&=): evita los
+    # temporales y la alineación de índices de cada operación entre Series
+    mask = df_range["NE Name"].isin(selected_nes).to_numpy()
+    mask &= df_range["VM_Type"].isin(selected_types).to_numpy()
+    mask &= df_range[cpu_column].notna().to_numpy()
+    # take() devuelve un DataFrame nuevo que no es vista de _df: se puede
+    # agregar Legend_Base sin una copia extra con .copy()
+    df_filtered = df_range.take(np.flatnonzero(mask))
+    # Legend_Base también como categoría: se normaliza cada tipo de VM una
+    # sola vez y las filas solo reciben el código correspondiente
+    vm_types = df_filtered["VM_Type"].cat
+    base_codes, base_categories = pd.factorize(vm_types.categories.map(normalize_legend_base))
+    df_filtered["Legend_Base"] = pd.Categorical.from_codes(base_codes[vm_types.codes.to_numpy()], base_categories)
+    return df_filtered
+
+def aggregate_trend(df_filtered, date_bucket, legend_groups, cpu_column):
+    """
+    Promedio de CPU por intervalo (date_bucket) y por VM, con la leyenda de
+    cada familia. Retorna el DataFrame ordenado por VM y fecha.
+    """
+    df_trend = df_filtered.groupby([date_bucket, "NE Name", "VM_Name", "VM_Type", "Legend_Base"], observed=True, sort=False)[cpu_column].mean().reset_index()
+    df_trend = df_trend.merge(legend_groups[["NE Name", "Legend_Base", "Legend"]], on=["NE Name", "Legend_Base"], how="left")
+    
+    # Renombrar para compatibilidad con el gráfico
+    df_trend = df_trend.rename(columns={"Date_Hour": "Date"})
+    
+    # IMPORTANTE: Ordenar por VM y fecha para que las líneas conecten correctamente
+    return df_trend.sort_values(["VM_Name", "Date"])
+
+@st.cache_data(max_entries=AGGREGATE_CACHE_ENTRIES, show_spinner=False)
+def build_trend(_df_filtered, file_key, start_ts, end_ts, selected_nes, selected_types, cpu_column):
+    """
+    Construye la tendencia por VM (una línea por VM) cada TREND_BUCKET_HOURS[0]
+    horas a partir del resultado de filter_data, sin volver a aplicar los filtros.
+    Para las gráficas, los NEs cuya tendencia supera TREND_MAX_POINTS se agrupan
+    con los intervalos siguientes de TREND_BUCKET_HOURS.
+    _df_filtered no se hashea: la caché se indexa por file_key y los filtros.
+    Retorna: (df_trend, df_chart, horas por intervalo de df_chart para cada NE)
+    """
+    # AGRUPACIÓN POR HORA: Reducir ruido visual sin colapsar las VMs
+    # (Date_Hour se precalcula al cargar el archivo)
+    legend_groups = (
+        _df_filtered.groupby(["NE Name", "Legend_Base"], observed=True, sort=False)
+        .agg(VM_Count=("VM_Name", "nunique"))
+        .reset_index()
+    )
+    legend_groups["Legend"] = legend_groups.apply(
+        lambda row: f"{row['Legend_Base']} ({int(row['VM_Count'])})" if row["VM_Count"] > 1 else row["Legend_Base"],
+        axis=1,
+    )
+
+    # Agrupar por hora y por VM para conservar cada línea individual. Esta
+    # tendencia base es la que usa el análisis de balance.
+    df_trend = aggregate_trend(_df_filtered, _df_filtered["Date_Hour"], legend_groups, cpu_column)
+
+    # Solo las gráficas de tendencia pasan a un intervalo mayor cuando hay
+    # demasiados puntos, para no saturar el navegador. Cada gráfica muestra un
+    # NE, así que el límite se aplica por NE: solo se reagrupan los NEs que lo
+    # superan y el resto conserva el intervalo base.
+    df_chart = df_trend
+    chart_hours = dict.fromkeys(df_trend["NE Name"].unique(), TREND_BUCKET_HOURS[0])
+    for bucket_hours in TREND_BUCKET_HOURS[1:]:
+        ne_points = df_chart["NE Name"].value_counts()
+        dense_nes = ne_points.index[ne_points > TREND_MAX_POINTS]
+        if dense_nes.empty:
+            break
+        df_dense = _df_filtered[_df_filtered["NE Name"].isin(dense_nes)]
+        date_bucket = df_dense["Date"].dt.floor(f"{bucket_hours}h").rename("Date_Hour")
+        df_chart = pd.concat(
+            [
+                df_chart[~df_chart["NE Name"].isin(dense_nes)],
+                aggregate_trend(df_dense, date_bucket, legend_groups, cpu_column),
+            ],
+            ignore_index=True,
+        )
+        chart_hours.update(dict.fromkeys(dense_nes, bucket_hours))
+    
+    return df_trend, df_chart, chart_hours
+
+def mean_from_vm_stats(vm_stats, key, cpu_column):
+    """
+    Promedio de CPU por `key` a partir de las sumas y conteos por VM.
+    Equivale a agrupar df_filtered por `key`, sin volver a recorrerlo.
+    """
+    grouped = vm_stats.groupby(key, observed=True, sort=False)[["CPU_Sum", "CPU_Count"]].sum()
+    means = (grouped["CPU_Sum"] / grouped["CPU_Count"]).astype("float32")
+    return means.rename(cpu_column).reset_index()
+
+@st.cache_data(max_entries=AGGREGATE_CACHE_ENTRIES, show_spinner=False)
+def build_stats(_df_filtered, file_key, start_ts, end_ts, selected_nes, selected_types, cpu_column):
+    """
+    Estadísticas por VM, por NE y por tipo de VM del resultado de filter_data.
+    Una sola pasada sobre _df_filtered: suma, conteo y máximo por VM; los
+    promedios por NE y por tipo de VM se derivan de esta tabla.
+    Retorna: (vm_stats, ne_stats, type_stats)
+    """
+    # vm_stats se devuelve ordenado por CPU_Max descendente (estable): el
+    # Top N de cada rerun es solo head(top_n)
+    vm_stats = (
+        _df_filtered.groupby(["VM_Name", "VM_Type", "NE Name"], observed=True, sort=False)[cpu_column]
+        .agg(CPU_Sum="sum", CPU_Count="count", CPU_Max="max")
+        .reset_index()
+        .sort_values("CPU_Max", ascending=False, kind="mergesort")
+    )
+    ne_stats = mean_from_vm_stats(vm_stats, "NE Name", cpu_column).sort_values(cpu_column, ascending=False)
+    type_stats = mean_from_vm_stats(vm_stats, "VM_Type", cpu_column).sort_values(cpu_column, ascending=False)
+    return vm_stats, ne_stats, type_stats
+
+@st.fragment
+def render_detail_table(df_filtered):
+    """
+    Tabla de datos detallados, de la fecha más reciente a la más antigua.
+    Es un fragmento: cambiar de página solo vuelve a ejecutar esta función,
+    no todo el dashboard.
+    """
+    # Enviar al navegador solo una página de filas
+    total_rows = len(df_filtered)
+    detail_pages = max((total_rows + DETAIL_PAGE_SIZE - 1) // DETAIL_PAGE_SIZE, 1)
+    detail_page = st.number_input("Página", min_value=1, max_value=detail_pages, value=1, step=1)
+    
+    page_start = (detail_page - 1) * DETAIL_PAGE_SIZE
+    page_end = min(page_start + DETAIL_PAGE_SIZE, total_rows)
+    # df_filtered ya viene ordenado por Date: la página se toma contando desde
+    # el final e invertida, sin ordenar todo el DataFrame
+    detail_view = df_filtered.iloc[total_rows - page_end:total_rows - page_start].iloc[::-1]
+    
+    st.caption(f"Filas {page_start + 1}-{page_end} de {total_rows} (página {detail_page} de {detail_pages})")
+    st.dataframe(detail_view, use_container_width=True, hide_index=True)
+
 # --- INTERFAZ ---
 
 with st.sidebar:
@@ -407,8 +665,9 @@ if uploaded_files:
         cpu_label = cpu_label_map[cpu_column]
 
         # --- FILTROS ---
-        min_date = df["Date"].min()
-        max_date = df["Date"].max()
+        # df viene ordenado por Date
+        min_date = df["Date"].iloc[0]
+        max_date = df["Date"].iloc[-1]
         
         start_date, end_date = st.sidebar.date_input(
             "Rango de Fechas",
@@ -420,84 +679,66 @@ if uploaded_files:
         st.sidebar.markdown("---")
         
         # --- FILTROS ---
-        all_nes = sorted(df["NE Name"].unique())
+        all_nes = df["NE Name"].cat.categories.tolist()
         selected_nes = st.sidebar.multiselect("NE Name", all_nes, default=all_nes)
         
-        all_types = sorted(df["VM_Type"].unique())
+        all_types = df["VM_Type"].cat.categories.tolist()
         selected_types = st.sidebar.multiselect("VM Type", all_types, default=all_types)
         
         threshold = st.sidebar.slider("Umbral de desbalance (%)", 0, 100, 10)
 
         # Aplicar filtros
-        mask = (
-            (df["Date"].dt.date >= start_date) &
-            (df["Date"].dt.date <= end_date) &
-            (df["NE Name"].isin(selected_nes)) &
-            (df["VM_Type"].isin(selected_types))
-        )
-        df_filtered = df.loc[mask].copy()
-        df_filtered = df_filtered.dropna(subset=[cpu_column])
+        # Comparar contra Timestamps evita crear un objeto date por fila
+        start_ts = pd.Timestamp(start_date)
+        end_ts = pd.Timestamp(end_date) + pd.Timedelta(days=1)
+        filter_key = (start_ts, end_ts, tuple(selected_nes), tuple(selected_types), cpu_column)
+        # Filtro, tendencia y estadísticas se cachean por archivo y filtros:
+        # los cambios de umbral, Top N o página no los recalculan
+        df_filtered = filter_data(df, active_file.file_id, *filter_key)
         
         if df_filtered.empty:
             st.warning("No hay datos para los filtros seleccionados.")
         else:
             # --- DASHBOARD ---
             
+            # Estadísticas por VM, NE y tipo de VM; las métricas generales
+            # también salen de la tabla por VM, sin recorrer df_filtered
+            vm_stats, ne_stats, type_stats = build_stats(df_filtered, active_file.file_id, *filter_key)
+            
             # Métricas
             col1, col2, col3, col4 = st.columns(4)
-            col1.metric("NEs Únicos", df_filtered["NE Name"].nunique())
-            col2.metric("VMs Únicas", df_filtered["VM_Name"].nunique())
-            col3.metric(f"{cpu_label} Promedio", f"{df_filtered[cpu_column].mean():.2f}%")
-            col4.metric(f"{cpu_label} Máximo", f"{df_filtered[cpu_column].max():.2f}%")
+            col1.metric("NEs Únicos", vm_stats["NE Name"].nunique())
+            col2.metric("VMs Únicas", vm_stats["VM_Name"].nunique())
+            col3.metric(f"{cpu_label} Promedio", f"{vm_stats['CPU_Sum'].sum() / vm_stats['CPU_Count'].sum():.2f}%")
+            col4.metric(f"{cpu_label} Máximo", f"{vm_stats['CPU_Max'].max():.2f}%")
             
             st.markdown("---")
             
             # --- GRÁFICA DE TENDENCIA PERSONALIZADA ---
-            st.subheader(f"Tendencia de {cpu_label} por NE y Tipo de VM (Promedio Horario)")
+            st.subheader(f"Tendencia de {cpu_label} por NE y Tipo de VM")
             
-            # AGRUPACIÓN POR HORA: Reducir ruido visual sin colapsar las VMs
-            df_filtered["Date_Hour"] = df_filtered["Date"].dt.floor("2H")
-            df_filtered["Legend_Base"] = df_filtered["VM_Type"].apply(normalize_legend_base)
-
-            legend_groups = (
-                df_filtered.groupby(["NE Name", "Legend_Base"])
-                .agg(VM_Count=("VM_Name", "nunique"))
-                .reset_index()
-            )
-            legend_groups["Legend"] = legend_groups.apply(
-                lambda row: f"{row['Legend_Base']} ({int(row['VM_Count'])})" if row["VM_Count"] > 1 else row["Legend_Base"],
-                axis=1,
-            )
-
-            # Agrupar por hora y por VM para conservar cada línea individual
-            df_trend = df_filtered.groupby(["Date_Hour", "NE Name", "VM_Name", "VM_Type", "Legend_Base"])[cpu_column].mean().reset_index()
-            df_trend = df_trend.merge(legend_groups[["NE Name", "Legend_Base", "Legend"]], on=["NE Name", "Legend_Base"], how="left")
-            
-            # Renombrar para compatibilidad con el gráfico
-            df_trend = df_trend.rename(columns={"Date_Hour": "Date"})
-            
-            # IMPORTANTE: Ordenar por VM y fecha para que las líneas conecten correctamente
-            df_trend = df_trend.sort_values(["VM_Name", "Date"])
+            df_trend, df_chart, trend_hours = build_trend(df_filtered, active_file.file_id, *filter_key)
             
-            # Generar mapa de colores personalizado
-            color_map = generate_color_map(df_trend)
+            # Separar la tendencia por NE una sola vez; cada gráfica toma su
+            # parte del diccionario en lugar de filtrar df_chart de nuevo
+            ne_groups = dict(tuple(df_chart.groupby("NE Name", observed=True, sort=False)))
             
             # Obtener NE Names únicos seleccionados
-            unique_nes = sorted(df_trend["NE Name"].unique())
+            unique_nes = sorted(ne_groups)
             
             # --- LÓGICA DE DISTRIBUCIÓN DE GRÁFICOS ---
             if len(unique_nes) == 1:
                 # CASO 1: Un solo NE Name -> Gráfico de ancho completo
                 ne_name = unique_nes[0]
-                df_ne = df_trend[df_trend["NE Name"] == ne_name].copy()
+                df_ne = ne_groups[ne_name]
                 
                 # Usar mapa de colores con diferentes hues para cada familia de VM
-                color_map_single = generate_color_map_single_ne(df_trend, ne_name, label_column="Legend")
+                color_map_single = generate_color_map_single_ne(df_ne, ne_name, label_column="Legend")
                 fig_line = build_vm_family_figure(
                     df_ne,
                     cpu_column,
                     cpu_label,
-                    f"{cpu_label} - {ne_name} (Promedio cada 2 Horas)",
+                    f"{cpu_label} - {ne_name} (Promedio cada {trend_hours[ne_name]} Horas)",
                     color_map_single,
                 )
                 
@@ -525,41 +766,14 @@ if uploaded_files:
                 
                 # Generar gráficos para la página actual (2 por fila)
                 for i in range(0, len(page_nes), 2):
-                    cols = st.columns(2)
-                    
-                    # Primer gráfico de la fila
-                    with cols[0]:
-                        try:
-                            ne_name = page_nes[i]
-                            df_ne = df_trend[df_trend["NE Name"] == ne_name].copy()
-                            
-                            # Usar mapa de colores con diferentes hues para cada familia de VM
-                            color_map_single = generate_color_map_single_ne(df_trend, ne_name, label_column="Legend")
-                            
-                            if df_ne.empty:
-                                st.warning(f"No hay datos para {ne_name}")
-                            else:
-                                fig_line = build_vm_family_figure(
-                                    df_ne,
-                                    cpu_column,
-                                    cpu_label,
-                                    f"{ne_name}",
-                                    color_map_single,
-                                )
-                                
-                                st.plotly_chart(fig_line, use_container_width=True)
-                        except Exception as e:
-                            st.error(f"Error al generar gráfico para {page_nes[i]}: {str(e)}")
-                    
-                    # Segundo gráfico de la fila (si existe)
-                    if i + 1 < len(page_nes):
-                        with cols[1]:
+                    for col, ne_name in zip(st.columns(2), page_nes[i:i + 2]):
+                        with col:
                             try:
-                                ne_name = page_nes[i + 1]
-                                df_ne = df_trend[df_trend["NE Name"] == ne_name].copy()
+                                df_ne = ne_groups[ne_name]
                                 
+                                # Usar mapa de colores con diferentes hues para cada familia de VM
+                                color_map_single = generate_color_map_single_ne(df_ne, ne_name, label_column="Legend")
                                 
-                                color_map_single = generate_color_map_single_ne(df_trend, ne_name, label_column="Legend")
                                 if df_ne.empty:
                                     st.warning(f"No hay datos para {ne_name}")
                                 else:
@@ -567,13 +781,13 @@ if uploaded_files:
                                         df_ne,
                                         cpu_column,
                                         cpu_label,
-                                        f"{ne_name}",
+                                        f"{ne_name} (Promedio cada {trend_hours[ne_name]} Horas)",
                                         color_map_single,
                                     )
                                     
                                     st.plotly_chart(fig_line, use_container_width=True)
                             except Exception as e:
-                                st.error(f"Error al generar gráfico para {page_nes[i + 1]}: {str(e)}")
+                                st.error(f"Error al generar gráfico para {ne_name}: {str(e)}")
                 
                 # Controles de paginación al final también
                 st.markdown("---")
@@ -593,19 +807,18 @@ if uploaded_files:
                         st.rerun()
             
             # --- OTRAS GRÁFICAS ---
+            
             col_left, col_right = st.columns(2)
             
             with col_left:
                 st.subheader(f"Top VMs ({cpu_label})")
                 top_n = st.slider("Top N", 5, 50, 10)
-                vm_stats = df_filtered.groupby(["VM_Name", "VM_Type", "NE Name"])[cpu_column].max().reset_index()
-                top_vms = vm_stats.sort_values(cpu_column, ascending=False).head(top_n)
-                top_vms = top_vms.rename(columns={cpu_column: "CPU_Usage"})
+                top_vms = vm_stats.head(top_n)[["VM_Name", "VM_Type", "NE Name", "CPU_Max"]]
+                top_vms = top_vms.rename(columns={"CPU_Max": "CPU_Usage"})
                 st.dataframe(top_vms.style.format({"CPU_Usage": "{:.2f}%"}), use_container_width=True)
                 
             with col_right:
                 st.subheader(f"Promedio por NE Name ({cpu_label})")
-                ne_stats = df_filtered.groupby("NE Name")[cpu_column].mean().reset_index().sort_values(cpu_column, ascending=False)
                 fig_bar = px.bar(
                     ne_stats, 
                     x="NE Name", 
@@ -619,7 +832,7 @@ if uploaded_files:
 
             st.subheader("Balance entre VMs de la misma leyenda")
             balance_trend = (
-                df_trend.groupby(["Date", "NE Name", "Legend"])
+                df_trend.groupby(["Date", "NE Name", "Legend"], observed=True)
                 .agg(
                     CPU_Max=(cpu_column, "max"),
                     CPU_Min=(cpu_column, "min"),
@@ -628,10 +841,16 @@ if uploaded_files:
                 .reset_index()
             )
             balance_trend["Spread"] = balance_trend["CPU_Max"] - balance_trend["CPU_Min"]
-            balance_trend["Balance_Group"] = balance_trend["NE Name"] + " | " + balance_trend["Legend"]
+            # Etiqueta "NE | Leyenda" armada desde el número de grupo: solo se
+            # formatea una cadena por combinación observada, no una por fila
+            balance_groups = balance_trend.groupby(["NE Name", "Legend"], observed=True)
+            balance_trend["Balance_Group"] = pd.Categorical.from_codes(
+                balance_groups.ngroup().to_numpy(),
+                categories=[f"{ne} | {legend}" for ne, legend in balance_groups.size().index],
+            )
 
             balance_summary = (
-                balance_trend.groupby(["NE Name", "Legend", "Balance_Group"])
+                balance_trend.groupby(["NE Name", "Legend", "Balance_Group"], observed=True)
                 .agg(
                     VM_Count=("VM_Count", "max"),
                     Spread_Mean=("Spread", "mean"),
@@ -652,7 +871,7 @@ if uploaded_files:
                         site_options,
                     )
 
-                site_summary = balance_summary[balance_summary["NE Name"] == selected_site].copy()
+                site_summary = balance_summary[balance_summary["NE Name"] == selected_site]
                 legend_options = site_summary["Balance_Group"].tolist()
 
                 if len(legend_options) == 1:
@@ -664,7 +883,7 @@ if uploaded_files:
                         format_func=lambda value: value.split(" | ", 1)[1],
                     )
 
-                balance_selected = balance_trend[balance_trend["Balance_Group"] == selected_balance_group].copy()
+                balance_selected = balance_trend[balance_trend["Balance_Group"] == selected_balance_group]
                 balance_info = site_summary[site_summary["Balance_Group"] == selected_balance_group].iloc[0]
 
                 col_b1, col_b2, col_b3, col_b4 = st.columns(4)
@@ -705,8 +924,6 @@ if uploaded_files:
                 st.info("No hay grupos de leyenda suficientes para calcular balance.")
 
             st.subheader(f"Comparativa por Tipo de VM ({cpu_label})")
-            type_stats = df_filtered.groupby("VM_Type")[cpu_column].mean().reset_index()
-            type_stats = type_stats.sort_values(cpu_column, ascending=False)
             
             fig_type = px.bar(
                 type_stats, 
@@ -718,7 +935,7 @@ if uploaded_files:
             st.plotly_chart(fig_type, use_container_width=True)
             
             with st.expander("Ver Datos Detallados"):
-                st.dataframe(df_filtered.sort_values("Date", ascending=False))
+                render_detail_table(df_filtered)
                 
     else:
         st.error("El archivo seleccionado no tiene el formato esperado o está vacío.")